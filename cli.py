@@ -28,21 +28,6 @@ asrt = """
 ::..::::..:::.......:::.......::::.....:::..::::..::
 """
 
-def run_cmd(cmd: list[str], desc: str):
-    """Ejecuta un comando y muestra errores de forma clara."""
-    try:
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
-    except FileNotFoundError:
-        print(f"[Error] Comando no encontrado: {cmd[0]}. Asegúrate de que esté instalado.")
-        sys.exit(1)
-    except subprocess.CalledProcessError as e:
-        print(f"[Error] Falló: {desc}")
-        print(f"Comando: {' '.join(cmd)}")
-        if e.stderr:
-            print(f"Detalle:\n{e.stderr.strip()}")
-        sys.exit(1)
-
-
 def parse_arguments():
     parser = argparse.ArgumentParser(
         description=(
@@ -96,20 +81,21 @@ def main():
             video_proc = ASCIIVideo(video_path=str(video_path), 
                                     ratio=args.ratio, 
                                     output_dir=str(output_dir), 
-                                    run_cmd=run_cmd,
                                     n_workers=n_workers
                                     )
-            video_proc.extract_frames()
-            video_proc.convert_frames_to_ascii()
-            video_proc.convert_svg_to_png()
-            final_video = video_proc.generate_final_video()
+            try:
+                final_video = video_proc.run()
+            except FileNotFoundError as e:
+                print(f"[Error] Comando no encontrado: {e.filename}. Asegúrate de que esté instalado.")
+                sys.exit(1)
+            except (RuntimeError, subprocess.CalledProcessError) as e:
+                print(f"[Error] {e}")
+                sys.exit(1)
             print(f"✅ ASCII video successfully generated: {final_video}")
-            video_proc.clean_up()
         else:
             convert_images_to_png(
                 input_dir=str(input_path),
                 output_dir=str(output_dir),
-                run_cmd=run_cmd,
                 ratio=args.ratio,
                 n_workers=n_workers
             )
@@ -0,0 +1,35 @@
+# Copyright (C) Daniel A. L.
+# Repository: https://github.com/caminodelaserpiente/AsciiMedia
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from src.ascii_svg import _init_worker, _render_image, get_ascii_indices
+
+
+# Nota: Se define a nivel de módulo para que sea serializable por multiprocessing.
+
+def frame_worker(task_queue, result_queue, font_path, font_size, size):
+    """
+    Proceso trabajador: consume (índice, frame gris) de task_queue y publica (índice, bytes renderizados
+    ya redimensionados a size) en result_queue hasta recibir la píldora venenosa (None).
+    """
+    _init_worker(font_path, font_size)
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        index, frame = task
+        rendered = _render_image(get_ascii_indices(frame), font_path, font_size, size)
+        result_queue.put((index, rendered.tobytes()))
@@ -17,82 +17,82 @@
 
 import multiprocessing
 import os
-import xml.etree.ElementTree as ET
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 
 import numpy as np
-from PIL import Image
-from numba import njit
+from PIL import Image, ImageDraw, ImageFont
 from tqdm import tqdm
 
 
 NORMAL_ASCII_CHARS = [' ', '.', ':', ';', ',', '*', 'o', '8', '#', '&', '%', '@', '$', '=', '+', '^']
-NUMBA_ASCII_CHARS_CODES = np.array([ord(c) for c in NORMAL_ASCII_CHARS])
-
-@njit
-def rgb_to_ascii_indices_numba(arr):
-    """Función acelerada con Numba para convertir RGB a una matriz de índices ASCII."""
-    # Nota: Numba no puede acceder a las listas de Python, por eso se pasa el array de códigos internamente.
-    # Usamos la constante NUMBA_ASCII_CHARS_CODES definida arriba.
-
+# Tabla precalculada: brillo (0-255) -> índice de caracter.
+LUT = (np.arange(256) * len(NORMAL_ASCII_CHARS) // 256).astype(np.uint8)
+# Pesos de luminancia ITU-R BT.601 (R, G, B).
+WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def get_ascii_indices(image):
+    """Convierte una imagen PIL (o un array en escala de grises) a una matriz de índices ASCII (uint8) usando tablas de búsqueda NumPy."""
+    arr = np.asarray(image)
+    if arr.ndim == 2:
+        # Ya en escala de grises (p. ej. frames rawvideo de ffmpeg)
+        return LUT[arr]
+    arr = arr.astype(np.float32)
     height, width, _ = arr.shape
-    ascii_indices = np.empty((height, width), dtype=np.int32)
-    n_chars = len(NUMBA_ASCII_CHARS_CODES)
-
-    for y in range(height):
-        for x in range(width):
-            pixel = arr[y, x]
-            # Cálculo de brillo promedio
-            brightness = (pixel[0] + pixel[1] + pixel[2]) // 3
-            # Mapeo de 0-255 a índice de caracter (0 a n_chars-1)
-            index = brightness * n_chars // 256 # Usar 256 para evitar índice fuera de rango con 255
-            if index >= n_chars:
-                index = n_chars - 1
-            ascii_indices[y, x] = index
-
-    return ascii_indices
-
-
-def get_ascii_matrix(image):
-    """Convierte una imagen PIL a una matriz de caracteres ASCII usando la función Numba."""
-    arr = np.array(image)
-    indices = rgb_to_ascii_indices_numba(arr)
-    # Aquí transformamos los índices a los caracteres finales
-    ascii_matrix = [[NORMAL_ASCII_CHARS[i] for i in row] for row in indices]
-    return ascii_matrix
+    # Cálculo de luminancia en una sola pasada (producto matriz-vector)
+    gray = (arr.reshape(-1, 3) @ WEIGHTS).reshape(height, width).astype(np.uint8)
+    return LUT[gray]
+
 
 # Nota: Estas funciones se definen fuera de la clase para que puedan ser 
 # llamadas correctamente desde el método estático y el ProcessPoolExecutor
 # sin tener que lidiar con la serialización de la clase completa.
 
-def _static_save_svg(ascii_image, file_path, font_size):
-    svg = ET.Element('svg', xmlns="http://www.w3.org/2000/svg", version="1.1")
-    height = len(ascii_image)
-    width = len(ascii_image[0]) if height > 0 else 0
+@lru_cache(maxsize=None)
+def _build_atlas(font_path, font_size):
+    """Pre-renderiza los caracteres ASCII en un atlas (n_chars, font_size, font_size) uint8."""
+    font = ImageFont.truetype(font_path, font_size)
+    tiles = []
+    for char in NORMAL_ASCII_CHARS:
+        tile = Image.new("L", (font_size, font_size), 0)
+        ImageDraw.Draw(tile).text((font_size / 2, font_size / 2), char, font=font, fill=255, anchor="mm")
+        tiles.append(np.asarray(tile))
+    return np.stack(tiles)
+
+
+def _init_worker(font_path, font_size):
+    """Inicializador por proceso: carga la fuente y construye el atlas una sola vez, antes de la primera tarea."""
+    _build_atlas(font_path, font_size)
+
+
+def _compose_frame(indices, font_path, font_size):
+    """Compone el frame completo desde el atlas con un solo indexado NumPy; devuelve un array (h*fs, w*fs) uint8."""
+    height, width = indices.shape
+    tiles = _build_atlas(font_path, font_size)[indices]  # (h, w, fs, fs)
+    return tiles.transpose(0, 2, 1, 3).reshape(height * font_size, width * font_size)
 
-    for y, row in enumerate(ascii_image):
-        for x, char in enumerate(row):
-            text = ET.SubElement(svg, 'text', {
-                'x': str(x * font_size),
-                'y': str((y + 1) * font_size),
-                'font-family': "Arial",
-                'font-size': str(font_size),
-                'fill': 'white'
-            })
-            text.text = char
 
-    svg.attrib['width'] = str(width * font_size)
-    svg.attrib['height'] = str(height * font_size)
-    svg.attrib['style'] = "background-color:black"
+def _render_image(indices, font_path, font_size, size=None):
+    """Renderiza los índices ASCII con el atlas como imagen PIL en escala de grises.
 
-    tree = ET.ElementTree(svg)
-    tree.write(file_path, encoding="utf-8", xml_declaration=True)
+    size: (width, height) final opcional; por defecto cada caracter ocupa font_size x font_size.
+    """
+    img = Image.fromarray(_compose_frame(indices, font_path, font_size))
+    if size and img.size != tuple(size):
+        img = img.resize(size, Image.Resampling.BILINEAR)
+    return img
+
+
+def _render_png(indices, out_path, font_path, font_size, size=None):
+    """Renderiza los índices ASCII con el atlas y los guarda como PNG."""
+    _render_image(indices, font_path, font_size, size).save(out_path, "PNG", compress_level=1)
 
 
 class ASCIIConverter:
     """Convierte lotes de imágenes a arte ASCII."""
 
-    def __init__(self, ratio, font_path, font_size=10):
+    def __init__(self, ratio, font_path, font_size=10, n_workers=None, use_threads=True):
         """
         Inicializa el convertidor con parámetros de configuración fijos.
 
@@ -101,35 +101,41 @@ class ASCIIConverter:
             font_size (int): Tamaño de la fuente para la salida gráfica.
             width_ratio (int): Factor de reducción horizontal.
             height_ratio (int): Factor de reducción vertical.
+            n_workers (int): Número de hilos o procesos en paralelo (por defecto, todos los núcleos).
+            use_threads (bool): Usar hilos en lugar de procesos; NumPy y Pillow liberan el GIL
+                en el trabajo pesado, así se evita serializar datos entre procesos.
         """
         self.font_path = font_path
         self.font_size = font_size
         self.width_ratio = ratio
         self.height_ratio = ratio
-        self.n_workers = multiprocessing.cpu_count()
+        self.n_workers = n_workers or multiprocessing.cpu_count()
+        self.use_threads = use_threads
 
 
     # --- MÉTODO CENTRAL DE PROCESAMIENTO (UNITARIO) ---
     @staticmethod
-    def _process_single_file_wrapper(file_path, output_dir, width_ratio, height_ratio, font_size):
-        """Función estática de ayuda para ser ejecutada por ProcessPoolExecutor."""
+    def _process_single_file_wrapper(file_path, output_dir, width_ratio, height_ratio, font_path, font_size):
+        """Función estática de ayuda para ser ejecutada por el pool de hilos o de procesos."""
         try:
             # 1. Cargar y Redimensionar
             with Image.open(file_path) as tmp:
-                tmp = tmp.copy().convert("RGB")
                 orig_w, orig_h = tmp.size
-                
-                new_w = max(1, int(orig_w / width_ratio))
-                new_h = max(1, int(orig_h / height_ratio))
-                tmp = tmp.resize((new_w, new_h))
 
-            # 2. Convertir a Matriz ASCII (usa la función global get_ascii_matrix)
-            ascii_matrix = get_ascii_matrix(tmp)
+                new_w = max(1, orig_w // width_ratio)
+                new_h = max(1, orig_h // height_ratio)
+                # En JPEG, decodificar directamente a escala reducida (1/2, 1/4, 1/8)
+                if tmp.format == "JPEG":
+                    tmp.draft("RGB", (new_w, new_h))
+                tmp = tmp.convert("RGB").resize((new_w, new_h), Image.Resampling.BILINEAR)
+
+            # 2. Convertir a índices ASCII (usa la función global get_ascii_indices)
+            indices = get_ascii_indices(tmp)
 
             # 3. Guardar el resultado (usando las funciones globales de guardado)
             base = os.path.splitext(os.path.basename(file_path))[0]
-            out_path = os.path.join(output_dir, base + ".svg")
-            _static_save_svg(ascii_matrix, out_path, font_size)
+            out_path = os.path.join(output_dir, base + ".png")
+            _render_png(indices, out_path, font_path, font_size, size=(orig_w, orig_h))
 
             return (file_path, out_path, None)
 
@@ -137,6 +143,12 @@ class ASCIIConverter:
             return (file_path, None, str(e))
 
 
+    @staticmethod
+    def _process_single_file_wrapper_packed(args):
+        """Versión de un solo argumento (tupla) de _process_single_file_wrapper, para executor.map."""
+        return ASCIIConverter._process_single_file_wrapper(*args)
+
+
     # --- MÉTODO PÚBLICO DE LOTE (BATCH) ---
     def convert_batch(self, input_path, output_path):
         """Convierte un lote de imágenes en paralelo."""
@@ -154,21 +166,33 @@ class ASCIIConverter:
         print(f"Input files detected: {len(files)}")
         print(f"Starting conversion with {self.n_workers} workers")
 
-        results = []
-        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
-            futures = [
-                executor.submit(
-                    ASCIIConverter._process_single_file_wrapper, # Llamamos al método estático
-                    f, 
-                    output_path, 
-                    self.width_ratio, 
-                    self.height_ratio, 
-                    self.font_size
-                )
-                for f in files
-            ]
-            for future in tqdm(futures, total=len(futures), desc="Converting"):
-                results.append(future.result())
+        args_list = [
+            (f, output_path, self.width_ratio, self.height_ratio, self.font_path, self.font_size)
+            for f in files
+        ]
+        # Con un solo archivo o un solo proceso, el pool solo añade coste de arranque y serialización
+        if len(files) <= 1 or self.n_workers == 1:
+            _init_worker(self.font_path, self.font_size)
+            results = list(tqdm(map(ASCIIConverter._process_single_file_wrapper_packed, args_list),
+                                total=len(files), desc="Converting"))
+        elif self.use_threads:
+            # Memoria compartida: el atlas se construye una vez y lo comparten todos los hilos
+            _init_worker(self.font_path, self.font_size)
+            with ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+                results = list(tqdm(
+                    executor.map(ASCIIConverter._process_single_file_wrapper_packed, args_list),
+                    total=len(files), desc="Converting"
+                ))
+        else:
+            # Agrupar tareas en bloques para reducir la serialización y el IPC por archivo
+            chunksize = max(1, len(files) // (self.n_workers * 4))
+            with ProcessPoolExecutor(max_workers=self.n_workers,
+                                     initializer=_init_worker,
+                                     initargs=(self.font_path, self.font_size)) as executor:
+                results = list(tqdm(
+                    executor.map(ASCIIConverter._process_single_file_wrapper_packed, args_list, chunksize=chunksize),
+                    total=len(files), desc="Converting"
+                ))
 
         correct = sum(1 for _, out, err in results if err is None)
         failed = [(f, out, err) for f, out, err in results if err is not None]
@@ -179,5 +203,5 @@ class ASCIIConverter:
             for f, _, err in failed[:5]:
                 print(f"{os.path.basename(f)} -> {err}")
 
-        print("Batch conversion to SVG completed.")
+        print("Batch conversion to PNG completed.")
         return results
@@ -15,81 +15,40 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
-from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-import shutil
+import heapq
+import multiprocessing
+import queue
 import subprocess
+import tempfile
+import threading
 
-from src.ascii_image import ArtASCII
-
+import numpy as np
+from tqdm import tqdm
 
-def convert_svg_to_png_task(args):
-    """
-    Tarea global para convertir un SVG a PNG en paralelo.
-    args: tuple(svg_path: Path, ref_size: tuple[int,int], output_dir: Path, run_cmd: callable)
-    """
-    svg_path, ref_size, output_dir, run_cmd = args
-    art_proc = ArtASCII(ratio=1, font_path="assets/Arial.ttf", font_size=10)
-    art_proc.svg_to_png(svg_path, ref_size=ref_size, output_dir=output_dir, run_cmd=run_cmd)
+from src.ascii_image import ArtASCII
+from src._workers import frame_worker
 
 
 class ASCIIVideo:
     """Clase que convierte videos completos a ASCII usando ArtASCII."""
 
-    def __init__(self, video_path: str, ratio: int, font_path: str = "assets/Arial.ttf", output_dir="out_ascii", run_cmd=None, n_workers=None):
+    def __init__(self, video_path: str, ratio: int, font_path: str = "assets/Arial.ttf", output_dir="out_ascii", n_workers=None):
         self.video_path = Path(video_path)
         self.output_dir = Path(output_dir)
-        self.run_cmd = run_cmd
         self.art = ArtASCII(ratio=ratio, font_path=font_path)
-        self.temp_frames_dir = Path("temp_frames")
-        self.temp_svg_dir = Path("temp_svg")
-        self.temp_png_dir = Path("temp_output_png")
-        self.n_workers = n_workers
+        self.src_size = None
+        self.n_workers = n_workers or multiprocessing.cpu_count()
 
-    def extract_frames(self):
-        """Extrae todos los frames del video usando ffmpeg."""
-        self.temp_frames_dir.mkdir(exist_ok=True)
-        self.run_cmd([
-            "ffmpeg", "-i", str(self.video_path),
-            "-vsync", "vfr", "-q:v", "2",
-            "-threads", str(self.n_workers),
-            str(self.temp_frames_dir / "frame_%09d.jpg")
-        ], "Extrayendo frames")
-
-    def convert_frames_to_ascii(self):
-        """Convierte todos los frames extraídos a ASCII SVG."""
-        self.temp_svg_dir.mkdir(exist_ok=True)
-        self.art.convert_batch_to_svg(str(self.temp_frames_dir), str(self.temp_svg_dir))
-        print("Proceeding to PNG rendering...")
-
-    def convert_svg_to_png(self, n_workers=None):
-        """Convierte los SVG generados a PNG usando ArtASCII.svg_to_png en paralelo."""
-        self.temp_png_dir.mkdir(exist_ok=True)
-        svg_files = list(self.temp_svg_dir.glob("*.svg"))
-
-        if not svg_files:
-            raise RuntimeError("No se encontraron SVGs para convertir a PNG.")
-
-        # Obtener tamaño de referencia solo una vez
-        first_frame = next(iter(self.temp_frames_dir.glob("*.jpg")), None)
-        if first_frame is None:
-            raise RuntimeError("No se encontraron frames para determinar tamaño.")
-
-        from PIL import Image
-        with Image.open(first_frame) as img:
-            ref_size = img.size  # (w, h)
-
-        # Preparar argumentos para paralelización
-        args_list = [(svg, ref_size, self.temp_png_dir, self.run_cmd) for svg in svg_files]
-
-        # Ejecutar en paralelo con función global
-        with ProcessPoolExecutor(max_workers=n_workers) as executor:
-            list(executor.map(convert_svg_to_png_task, args_list))
-        print("Proceeding to final video encoding...")
-
-    def generate_final_video(self, framerate=None):
-        """Combina los PNG generados en un video final con audio original."""
+    def run(self, framerate=None):
+        """
+        Pipeline maestro-trabajador: decodificador ffmpeg → cola acotada → procesos trabajadores
+        → reensamblado en orden → codificador ffmpeg. No usa directorios temporales.
+
+        Si falla el decodificador, el codificador o algún trabajador, se detiene todo el pipeline,
+        se elimina el video parcial y se lanza RuntimeError.
+        """
         self.output_dir.mkdir(exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         final_video = self.output_dir / f"{self.video_path.stem}_{timestamp}{self.video_path.suffix}"
@@ -99,16 +58,195 @@ class ASCIIVideo:
             framerate = self._get_video_framerate()
             print(f"Detected source framerate: {framerate}")
 
-        self.run_cmd([
-            "ffmpeg", "-framerate", str(framerate),
-            "-i", str(self.temp_png_dir / "frame_%09d.png"),
+        self.src_size = self._get_video_size()
+
+        # Máximo de frames en vuelo (cola de tareas + trabajadores + cola de resultados + reordenamiento)
+        capacity = 4 * self.n_workers
+        slots = threading.Semaphore(capacity)
+        task_queue = multiprocessing.Queue(maxsize=capacity)
+        result_queue = multiprocessing.Queue(maxsize=2 * self.n_workers)
+        workers = [
+            multiprocessing.Process(
+                target=frame_worker,
+                args=(task_queue, result_queue, self.art.font_path, self.art.font_size, self.src_size),
+                daemon=True
+            )
+            for _ in range(self.n_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        encoder_log = tempfile.TemporaryFile()
+        encoder_cmd = self._encoder_cmd(final_video, framerate)
+        encoder = subprocess.Popen(encoder_cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=encoder_log)
+        stop = threading.Event()
+        status = {"broken": False, "missing": 0}
+        writer = threading.Thread(
+            target=self._write_frames, args=(result_queue, encoder.stdin, slots, stop, status), daemon=True
+        )
+        writer.start()
+
+        def check():
+            """Aborta si el codificador terminó antes de tiempo o algún trabajador murió."""
+            if not writer.is_alive():
+                raise RuntimeError("El proceso de escritura de frames terminó inesperadamente.")
+            if status["broken"] or encoder.poll() is not None:
+                encoder.wait()
+                raise RuntimeError(self._ffmpeg_error("Creando video final", encoder_cmd, encoder_log))
+            dead = [w for w in workers if w.exitcode not in (None, 0)]
+            if dead:
+                raise RuntimeError(f"{len(dead)} procesos trabajadores terminaron con error.")
+
+        frames = self.extract_frames()
+        try:
+            for index, frame in enumerate(tqdm(frames, desc="Converting")):
+                while not slots.acquire(timeout=0.5):
+                    check()
+                check()
+                self._put(task_queue, (index, frame), check)
+            # Píldoras venenosas: una por trabajador
+            for _ in workers:
+                self._put(task_queue, None, check)
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(timeout=0.5)
+                    check()
+            check()
+
+            result_queue.put(None)
+            writer.join()
+            if encoder.wait() != 0 or status["broken"]:
+                raise RuntimeError(self._ffmpeg_error("Creando video final", encoder_cmd, encoder_log))
+            if status["missing"]:
+                raise RuntimeError(f"Faltan {status['missing']} frames en el video final.")
+        except BaseException:
+            # Orden de cierre: el escritor debe terminar mientras los trabajadores siguen vivos,
+            # para que ningún frame quede a medio enviar por result_queue.
+            stop.set()
+            frames.close()
+            # Matar el codificador desbloquea al escritor si está detenido en stdin.write (BrokenPipeError)
+            if encoder.poll() is None:
+                encoder.kill()
+            encoder.wait()
+            writer.join(timeout=5)
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+            for worker in workers:
+                worker.join()
+            # Los datos pendientes en las colas ya no tienen consumidor
+            task_queue.cancel_join_thread()
+            result_queue.cancel_join_thread()
+            final_video.unlink(missing_ok=True)
+            raise
+        finally:
+            encoder_log.close()
+
+        return final_video
+
+    def extract_frames(self):
+        """Decodifica el video con ffmpeg ya escalado y en escala de grises, y entrega cada frame como array NumPy."""
+        width, height = self._get_frame_size()
+        frame_bytes = width * height
+
+        cmd = [
+            "ffmpeg", "-v", "error", "-i", str(self.video_path),
+            "-vsync", "vfr",
+            "-vf", f"scale={width}:{height},format=gray",
+            "-threads", str(self.n_workers),
+            "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1"
+        ]
+        with tempfile.TemporaryFile() as log:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=log)
+            completed = False
+            try:
+                while True:
+                    chunk = proc.stdout.read(frame_bytes)
+                    if len(chunk) < frame_bytes:
+                        break
+                    yield np.frombuffer(chunk, dtype=np.uint8).reshape(height, width)
+                completed = True
+            finally:
+                proc.stdout.close()
+                # Si el consumidor abandonó el generador, detener ffmpeg en lugar de esperar a que termine
+                if not completed and proc.poll() is None:
+                    proc.kill()
+                returncode = proc.wait()
+            if returncode != 0:
+                raise RuntimeError(self._ffmpeg_error("Extrayendo frames", cmd, log))
+
+    def _encoder_cmd(self, final_video, framerate):
+        """Comando del codificador ffmpeg: frames rawvideo grises por stdin a la resolución original, más el audio original."""
+        src_w, src_h = self.src_size
+        return [
+            "ffmpeg", "-v", "error",
+            "-f", "rawvideo", "-pix_fmt", "gray",
+            "-s", f"{src_w}x{src_h}", "-framerate", str(framerate),
+            "-i", "pipe:0",
             "-i", str(self.video_path),
             "-c:v", "libx264", "-pix_fmt", "yuv420p",
             "-map", "0:v", "-map", "1:a?", "-shortest",
             str(final_video)
-        ], "Creando video final")
+        ]
+
+    @staticmethod
+    def _ffmpeg_error(desc, cmd, log):
+        """Construye el mensaje de error con el comando y la salida de error capturada de ffmpeg."""
+        log.seek(0)
+        detail = log.read().decode(errors="replace").strip()
+        message = f"Falló: {desc}\nComando: {' '.join(cmd)}"
+        if detail:
+            message += f"\nDetalle:\n{detail}"
+        return message
+
+    @staticmethod
+    def _put(task_queue, item, check):
+        """Encola una tarea sin bloquear indefinidamente: mientras la cola esté llena, verifica el estado del pipeline."""
+        while True:
+            try:
+                task_queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                check()
 
-        return final_video 
+    @staticmethod
+    def _write_frames(result_queue, stdin, slots, stop, status):
+        """
+        Reordena los frames renderizados por índice (cola de prioridad) y los escribe en orden al codificador.
+        Libera un hueco de `slots` por cada frame escrito. Si el codificador cierra su entrada, sigue vaciando
+        result_queue (descartando los frames) para que los trabajadores nunca queden bloqueados.
+        """
+        heap = []
+        next_index = 0
+        while not stop.is_set():
+            try:
+                item = result_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            if status["broken"]:
+                continue
+            heapq.heappush(heap, item)
+            try:
+                while heap and heap[0][0] == next_index:
+                    stdin.write(heapq.heappop(heap)[1])
+                    next_index += 1
+                    slots.release()
+            except BrokenPipeError:
+                status["broken"] = True
+                heap.clear()
+        # Frames que nunca pudieron escribirse por un hueco en la secuencia
+        status["missing"] = len(heap)
+        try:
+            stdin.close()
+        except BrokenPipeError:
+            pass
+
+    def _get_frame_size(self):
+        """Calcula la resolución ASCII (columnas, filas) a partir de la resolución original y el ratio."""
+        src_w, src_h = self.src_size or self._get_video_size()
+        return max(1, src_w // self.art.ratio), max(1, src_h // self.art.ratio)
 
     def _get_video_framerate(self):
         """Obtiene el framerate original del video (formato literal, ej: '30000/1001')."""
@@ -127,8 +265,15 @@ class ASCIIVideo:
             rate_str = "30/1"  # fallback seguro
         return rate_str
 
-    def clean_up(self):
-        """Elimina todos los directorios temporales utilizados en el proceso."""
-        shutil.rmtree(self.temp_frames_dir, ignore_errors=True)
-        shutil.rmtree(self.temp_svg_dir, ignore_errors=True)
-        shutil.rmtree(self.temp_png_dir, ignore_errors=True)
+    def _get_video_size(self):
+        """Obtiene la resolución original del video como (ancho, alto)."""
+        cmd = [
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=width,height",
+            "-of", "csv=s=x:p=0",
+            str(self.video_path)
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        width, height = result.stdout.strip().split("x")[:2]
+        return int(width), int(height)